@@ -1,15 +1,96 @@
 #!/usr/bin/env python
 
-import glob
+import fnmatch
+import ftplib
+import functools
+import hashlib
+import json
 import logging
 import os
 import re
 import shutil
-import urllib
-import urllib.request
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
 
 from util.api_handling import Util
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# yyyy/mm/accession fragment of a public file path
+_PATH_FRAGMENT_RE = re.compile(r'\d{4}/\d{2}/PXD\d+')
+
+# shared by all HTTPS download workers so that connections are kept alive and reused between files
+_https_session = requests.Session()
+_https_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+
+def _parse_json(response):
+    """
+    Decode a JSON API response, using orjson when it is installed
+    :param response: API response
+    :return: decoded JSON
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def _load_json_file(path):
+    """
+    Read a JSON file, using orjson when it is installed
+    :param path: JSON file path
+    :return: decoded JSON
+    """
+    with open(path, 'rb') as json_file:
+        content = json_file.read()
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _save_json_file(path, content):
+    """
+    Atomically write content as a JSON file, readers never see a partially written file
+    :param path: JSON file path
+    :param content: content to encode
+    """
+    if orjson is not None:
+        data = orjson.dumps(content)
+    else:
+        data = json.dumps(content).encode()
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    tmp_file = tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False)
+    try:
+        with tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_file.name, path)
+    except OSError:
+        # do not leave temporary files behind in the cache folder
+        os.unlink(tmp_file.name)
+        raise
+
+
+@functools.lru_cache(maxsize=128)
+def _raw_list(request_url):
+    """
+    Fetch the raw file list of a project once per session, repeated calls reuse the parsed response
+    :param request_url: PRIDE API url of the project raw file list
+    :return: raw file list in JSON format
+    """
+    response = Util.get_api_call(request_url)
+    return _parse_json(response)
+
 
 class Files:
     """
@@ -17,9 +98,32 @@ class Files:
     """
 
     api_base_url = "https://www.ebi.ac.uk/pride/ws/archive/v2/"
+    # raw files are often several GB, read and write them in large blocks
+    download_chunk_size = 4 * 1024 * 1024
+    # interrupted downloads are resumed up to download_retries times, waiting retry_backoff * 2^attempt seconds
+    download_retries = 5
+    retry_backoff = 1
+    # seconds to wait for a connection or for data before a download attempt fails
+    download_timeout = 60
+    # network errors only, permanent FTP errors (eg: 550 file not found) and local disk errors are not retried
+    _ftp_retry_errors = (ftplib.error_temp, ftplib.error_reply, ftplib.error_proto, EOFError, ConnectionError,
+                         TimeoutError, socket.timeout, socket.gaierror)
+    cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'pridepy')
+
+    def __init__(self, cache_ttl=0):
+        """
+        :param cache_ttl: seconds for which raw file lists are cached on disk, 0 disables the disk cache
+        """
+        self.cache_ttl = cache_ttl
 
-    def __init__(self):
-        pass
+    def _build_url(self, path, params):
+        """
+        Build a PRIDE API url, escaping the query parameters. RSQL operators and separators are kept readable.
+        :param path: endpoint path relative to the API base url
+        :param params: query parameters
+        :return: request url
+        """
+        return self.api_base_url + path + "?" + urlencode(params, safe=",=()")
 
     def get_all_paged_files(self, query_filter, page_size, page, sort_direction, sort_conditions):
         """
@@ -31,65 +135,379 @@ class Files:
         :param sort_conditions: Field(s) for sorting the results on
         :return: paged file list on JSON format
         """
-        """
-           
-        """
-        request_url = self.api_base_url + "files?"
-
+        params = {}
         if query_filter:
-            request_url = request_url + "filter=" + query_filter + "&"
+            params["filter"] = query_filter
+        params.update({"pageSize": page_size, "page": page, "sortDirection": sort_direction,
+                       "sortConditions": sort_conditions})
+        request_url = self._build_url("files", params)
 
-        request_url = request_url + "pageSize=" + str(page_size) + "&page=" + str(page) + "&sortDirection=" + sort_direction + "&sortConditions=" + sort_conditions
+        response = Util.get_api_call(request_url)
+        return _parse_json(response)
 
-        headers = {"Accept": "application/JSON"}
-        response = Util.get_api_call(request_url, headers)
-        return response.json()
+    def iter_files(self, query_filter, page_size=100, sort_direction='ASC', sort_conditions='submissionDate'):
+        """
+        Iterate over all filtered pride submission files, page by page. The next page is fetched in the background
+        while the files of the current page are consumed.
+        :param query_filter: Parameters to filter the search results
+        :param page_size: Number of results to fetch in a page
+        :param sort_direction: Sorting direction: ASC or DESC
+        :param sort_conditions: Field(s) for sorting the results on
+        :return: generator of files in JSON format
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = 0
+            next_page = executor.submit(self.get_all_paged_files, query_filter, page_size, page, sort_direction,
+                                        sort_conditions)
+            while next_page is not None:
+                result = next_page.result()
+                files = result.get('_embedded', {}).get('files', [])
+                page += 1
+                # the server may return fewer files than requested per page, so rely on totalPages to stop
+                if not files or page >= result.get('page', {}).get('totalPages', 0):
+                    next_page = None
+                else:
+                    next_page = executor.submit(self.get_all_paged_files, query_filter, page_size, page,
+                                                sort_direction, sort_conditions)
+                yield from files
 
     def get_all_raw_file_list(self, project_accession):
         """
-        Get all raw file list from PRIDE API for a given project_accession
+        Get all raw file list from PRIDE API for a given project_accession.
+        When cache_ttl is set, the list is read from the disk cache while it is fresh.
         :param project_accession: PRIDE accession
         :return: raw file list in JSON format
         """
+        request_url = self._build_url("files/byProject",
+                                      {"accession": project_accession + ",fileCategory.value==RAW"})
+        if not self.cache_ttl:
+            # copy the cached list, so that callers changing it do not change what later calls return
+            return list(_raw_list(request_url))
 
-        request_url = self.api_base_url + "files/byProject?accession=" + project_accession + ",fileCategory.value==RAW"
-        headers = {"Accept": "application/JSON"}
+        cache_path = os.path.join(self.cache_dir, project_accession + ".json")
+        try:
+            if os.path.getmtime(cache_path) > time.time() - self.cache_ttl:
+                return _load_json_file(cache_path)
+        except (OSError, ValueError) as cache_error:
+            logging.debug("raw file list cache miss: " + str(cache_error))
 
-        response = Util.get_api_call(request_url, headers)
-        return response.json()
+        # the in-memory cache never expires, bypass it so that an expired entry is fetched again
+        raw_file_list = _raw_list.__wrapped__(request_url)
+        try:
+            _save_json_file(cache_path, raw_file_list)
+        except OSError as cache_error:
+            logging.warning("Could not cache raw file list: " + str(cache_error))
+        return raw_file_list
 
-    def download_raw_files_from_ftp(self, accession, output_folder):
+    def download_raw_files_from_ftp(self, accession, output_folder, protocol='ftp'):
         """
         This method will download all the raw files from PRIDE FTP
         :param output_folder: output directory where raw files will get saved
         :param accession: PRIDE accession
+        :param protocol: transfer protocol, ftp or https
         :return: None
         """
 
-        if not (os.path.isdir(output_folder)):
-            os.mkdir(output_folder)
+        os.makedirs(output_folder, exist_ok=True)
 
         response_body = self.get_all_raw_file_list(accession)
 
-        self.download_files_from_ftp(response_body, output_folder)
+        self._download(response_body, output_folder, protocol)
+
+    @staticmethod
+    def download_files_from_ftp(file_list_json, output_folder, max_workers=8):
+        """
+        Download files using ftp transfer url. Files are downloaded in parallel, one file per worker thread.
+        Each worker logs in to the FTP server once and reuses that session for all the files it downloads.
+        :param file_list_json: file list in json format
+        :param output_folder: folder to download the files
+        :param max_workers: number of files to download concurrently
+        """
+        Files._download(file_list_json, output_folder, 'ftp', max_workers)
+
+    @staticmethod
+    def download_files_from_https(file_list_json, output_folder, max_workers=8):
+        """
+        Download files using https transfer url. Files are downloaded in parallel, one file per worker thread,
+        over a shared keep-alive connection pool.
+        :param file_list_json: file list in json format
+        :param output_folder: folder to download the files
+        :param max_workers: number of files to download concurrently
+        """
+        Files._download(file_list_json, output_folder, 'https', max_workers)
 
     @staticmethod
-    def download_files_from_ftp(file_list_json, output_folder):
+    def _download(file_list_json, output_folder, protocol='ftp', max_workers=8):
         """
-        Download files using ftp transfer url
+        Download files in parallel with the given transfer protocol
         :param file_list_json: file list in json format
         :param output_folder: folder to download the files
+        :param protocol: transfer protocol, ftp or https
+        :param max_workers: number of files to download concurrently
         """
+        download_list = []
         for file in file_list_json:
-            if file['publicFileLocations'][0]['name'] == 'FTP Protocol':
-                ftp_filepath = file['publicFileLocations'][0]['value']
-            else:
-                ftp_filepath = file['publicFileLocations'][1]['value']
-            logging.debug('ftp_filepath:' + ftp_filepath)
-            public_filepath_part = ftp_filepath.rsplit('/', 1)
+            file_url = Files._get_file_url(file, protocol)
+            logging.debug('file_url:' + file_url)
+            public_filepath_part = file_url.rsplit('/', 1)
             logging.debug(file['accession'] + " -> " + public_filepath_part[1])
-            new_file_path = public_filepath_part[1]
-            urllib.request.urlretrieve(ftp_filepath, output_folder + new_file_path)
+            new_file_path = os.path.join(output_folder, public_filepath_part[1])
+            download_list.append((file_url, new_file_path, file))
+
+        if protocol == 'https':
+            def fetch_https(download):
+                file_url, new_file_path, file = download
+                checksum = Files._retry(
+                    lambda: Files._fetch_one_https(file_url, new_file_path, file.get('fileSizeBytes')),
+                    new_file_path, Files._is_transient_https_error)
+                Files._verify_checksum(new_file_path, file.get('checksum'), checksum)
+
+            Files._run_in_parallel(fetch_https, download_list, lambda download: download[1], max_workers)
+            return
+
+        thread_local = threading.local()
+        connections = []
+
+        def fetch_once(url, new_file_path, file_size):
+            if not hasattr(thread_local, 'connections'):
+                thread_local.connections = {}
+            ftp = thread_local.connections.get(url.hostname)
+            if ftp is None:
+                ftp = Files._ftp_connect(url.hostname)
+                thread_local.connections[url.hostname] = ftp
+                connections.append(ftp)
+            try:
+                return Files._fetch_one(ftp, url.path, new_file_path, file_size)
+            except Exception:
+                # the session may be broken, the next download in this worker logs in again
+                del thread_local.connections[url.hostname]
+                connections.remove(ftp)
+                Files._ftp_close(ftp)
+                raise
+
+        def fetch(download):
+            ftp_filepath, new_file_path, file = download
+            url = urlsplit(ftp_filepath)
+            checksum = Files._retry(lambda: fetch_once(url, new_file_path, file.get('fileSizeBytes')),
+                                    new_file_path, lambda error: isinstance(error, Files._ftp_retry_errors))
+            Files._verify_checksum(new_file_path, file.get('checksum'), checksum)
+
+        try:
+            Files._run_in_parallel(fetch, download_list, lambda download: download[1], max_workers)
+        finally:
+            for ftp in connections:
+                Files._ftp_close(ftp)
+
+    @staticmethod
+    def _run_in_parallel(action, items, item_name, max_workers):
+        """
+        Run an action on every item in a thread pool. All the items are processed even if some of them fail,
+        each failure is logged and a summary of the failed items is raised at the end.
+        :param action: function applied to each item
+        :param items: items to process
+        :param item_name: function giving the name of an item, used to report failures
+        :param max_workers: number of items to process concurrently
+        """
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(action, item): item for item in items}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as error:
+                    name = item_name(futures[future])
+                    logging.error(name + " failed: " + str(error))
+                    failed.append(name)
+        if failed:
+            raise Exception(str(len(failed)) + " of " + str(len(items)) + " files failed: " + ", ".join(sorted(failed)))
+
+    @staticmethod
+    def _retry(fetch, file_path, is_transient):
+        """
+        Run a download, retrying it with exponential backoff on transient errors.
+        Each retry resumes from the bytes already written to the file.
+        :param fetch: function doing the download
+        :param file_path: downloaded file path
+        :param is_transient: function telling whether an error is worth retrying
+        :return: result of fetch
+        """
+        for attempt in range(Files.download_retries + 1):
+            try:
+                return fetch()
+            except Exception as download_error:
+                if attempt == Files.download_retries or not is_transient(download_error):
+                    raise
+                wait = Files.retry_backoff * 2 ** attempt
+                logging.warning("Download of " + file_path + " failed (" + str(download_error) +
+                                "), resuming in " + str(wait) + " seconds")
+                time.sleep(wait)
+
+    @staticmethod
+    def _is_transient_https_error(error):
+        """
+        Tell whether an https download error is worth retrying: network errors, timeouts and server errors.
+        Client errors such as 403 or 404 are permanent.
+        :param error: exception raised by the download
+        :return: True if the download should be retried
+        """
+        if isinstance(error, requests.HTTPError):
+            return error.response is not None and error.response.status_code >= 500
+        return isinstance(error, (requests.ConnectionError, requests.Timeout,
+                                  requests.exceptions.ChunkedEncodingError))
+
+    @staticmethod
+    def _resume_offset(file_path, file_size):
+        """
+        Get the position from which a partially downloaded file can be resumed
+        :param file_path: downloaded file path
+        :param file_size: expected file size in bytes, if known
+        :return: number of bytes already downloaded, 0 to download the file from the beginning
+        """
+        if not file_size or not os.path.isfile(file_path):
+            return 0
+        offset = os.path.getsize(file_path)
+        # a bigger file is not a partial download of this one, download it again
+        return offset if offset <= file_size else 0
+
+    @staticmethod
+    def _hash_file(file_path, checksum):
+        """
+        Add the content of an existing file to a checksum
+        :param file_path: file path
+        :param checksum: hashlib object to update
+        """
+        with open(file_path, 'rb') as existing_file:
+            for block in iter(lambda: existing_file.read(Files.download_chunk_size), b''):
+                checksum.update(block)
+
+    @staticmethod
+    def _verify_checksum(file_path, expected_checksum, checksum):
+        """
+        Compare the checksum computed while downloading a file with the one provided by PRIDE API.
+        A corrupt file is removed, so that the next download starts again from the beginning.
+        :param file_path: downloaded file path
+        :param expected_checksum: SHA-1 checksum from PRIDE API, if any
+        :param checksum: SHA-1 checksum of the downloaded bytes
+        :raises ValueError: if the checksums do not match
+        """
+        if expected_checksum and expected_checksum.lower() != checksum:
+            os.remove(file_path)
+            raise ValueError("Checksum mismatch for " + file_path + ": expected " + expected_checksum +
+                             ", got " + checksum)
+
+    @staticmethod
+    def _pick_location(file, protocol='FTP Protocol'):
+        """
+        Get the public location of a file for the given publicFileLocations name
+        :param file: file in json format
+        :param protocol: location name, eg: FTP Protocol, Aspera Protocol
+        :return: file location
+        """
+        locations = {location['name']: location['value'] for location in file['publicFileLocations']}
+        if protocol not in locations:
+            raise ValueError(protocol + " location not found for " + file['accession'])
+        return locations[protocol]
+
+    @staticmethod
+    def _get_file_url(file, protocol):
+        """
+        Get the public url of a file for the given transfer protocol.
+        PRIDE FTP area is also served over https, so the https url is derived from the ftp one
+        when the API does not list an https location.
+        :param file: file in json format
+        :param protocol: transfer protocol, ftp or https
+        :return: file url
+        """
+        if protocol == 'https':
+            try:
+                return Files._pick_location(file, 'HTTP Protocol')
+            except ValueError:
+                ftp_url = urlsplit(Files._pick_location(file, 'FTP Protocol'))
+                return ftp_url._replace(scheme='https').geturl()
+        return Files._pick_location(file, 'FTP Protocol')
+
+    @staticmethod
+    def _ftp_connect(host):
+        """
+        Open an anonymous FTP session
+        :param host: FTP server host name
+        :return: logged in ftplib.FTP connection
+        """
+        ftp = ftplib.FTP(host, timeout=Files.download_timeout)
+        ftp.login()
+        return ftp
+
+    @staticmethod
+    def _ftp_close(ftp):
+        """
+        Close an FTP session, ignoring errors from connections the server already dropped
+        :param ftp: ftplib.FTP connection
+        """
+        try:
+            ftp.quit()
+        except ftplib.all_errors:
+            ftp.close()
+
+    @staticmethod
+    def _fetch_one(ftp, remote_path, new_file_path, file_size=None):
+        """
+        Download a single file over an open FTP session, resuming a partial download with REST
+        :param ftp: logged in ftplib.FTP connection
+        :param remote_path: path of the file in the FTP server
+        :param new_file_path: destination file path
+        :param file_size: expected file size in bytes, if known
+        :return: SHA-1 checksum of the downloaded file, computed while it is written
+        """
+        checksum = hashlib.sha1()
+        offset = Files._resume_offset(new_file_path, file_size)
+        if offset:
+            Files._hash_file(new_file_path, checksum)
+            if offset == file_size:
+                logging.info(new_file_path + " already downloaded")
+                return checksum.hexdigest()
+            logging.info("Resuming " + new_file_path + " from byte " + str(offset))
+
+        with open(new_file_path, 'ab' if offset else 'wb', buffering=Files.download_chunk_size) as new_file:
+            def write(block):
+                new_file.write(block)
+                checksum.update(block)
+
+            ftp.retrbinary('RETR ' + remote_path, write, blocksize=Files.download_chunk_size, rest=offset or None)
+        return checksum.hexdigest()
+
+    @staticmethod
+    def _fetch_one_https(file_url, new_file_path, file_size=None):
+        """
+        Stream a single file over https, resuming a partial download with a Range request
+        :param file_url: https url of the file
+        :param new_file_path: destination file path
+        :param file_size: expected file size in bytes, if known
+        :return: SHA-1 checksum of the downloaded file, computed while it is written
+        """
+        checksum = hashlib.sha1()
+        offset = Files._resume_offset(new_file_path, file_size)
+        headers = {}
+        if offset:
+            if offset == file_size:
+                logging.info(new_file_path + " already downloaded")
+                Files._hash_file(new_file_path, checksum)
+                return checksum.hexdigest()
+            headers['Range'] = 'bytes=' + str(offset) + '-'
+
+        with _https_session.get(file_url, headers=headers, stream=True, timeout=Files.download_timeout) as response:
+            response.raise_for_status()
+            # servers that ignore the Range header send the whole file back
+            if response.status_code == 206:
+                logging.info("Resuming " + new_file_path + " from byte " + str(offset))
+                Files._hash_file(new_file_path, checksum)
+                mode = 'ab'
+            else:
+                mode = 'wb'
+            with open(new_file_path, mode, buffering=Files.download_chunk_size) as new_file:
+                for chunk in response.iter_content(chunk_size=Files.download_chunk_size):
+                    new_file.write(chunk)
+                    checksum.update(chunk)
+        return checksum.hexdigest()
 
     def get_submitted_file_path_prefix(self, accession):
         """
@@ -102,8 +520,8 @@ class Files:
         :return: path fragment (eg: 2018/10/PXD008644)
         """
         results = self.get_all_raw_file_list(accession)
-        first_file = results[0]['publicFileLocations'][0]['value']
-        path_fragment = re.search(r'\d{4}/\d{2}/PXD\d*', first_file).group()
+        first_file = self._pick_location(results[0])
+        path_fragment = _PATH_FRAGMENT_RE.search(first_file).group()
         return path_fragment
 
     @staticmethod
@@ -112,15 +530,23 @@ class Files:
         match files with provided regex in the source location
         :param regex: files to match
         :param location: location to search files
-        :return:
+        :return: set of matched file names
         """
+        pattern = regex.lstrip('/')
+        file_list_from_dir = set()
 
-        file_list_from_dir = []
-
-        for file in glob.glob(location + regex):
-            logging.debug("found file: " + file)
-            filename = file.rsplit('/', 1)[1]
-            file_list_from_dir.append(filename)
+        try:
+            with os.scandir(location) as entries:
+                for entry in entries:
+                    # like glob, hidden files only match patterns that start with a dot
+                    if entry.name.startswith('.') and not pattern.startswith('.'):
+                        continue
+                    if fnmatch.fnmatchcase(entry.name, pattern):
+                        logging.debug("found file: " + entry.path)
+                        file_list_from_dir.add(entry.name)
+        except OSError as dir_error:
+            # like glob, an unreadable or missing folder has no matching files, callers report the folder
+            logging.debug("Could not list " + location + ": " + str(dir_error))
         return file_list_from_dir
 
     def copy_raw_files_from_dir(self, accession, source_base_directory):
@@ -147,61 +573,155 @@ class Files:
 
         self.copy_from_dir(complete_source_dir, file_list_from_dir, response_body)
 
-    def download_file_from_ftp_by_name(self, accession, file_name, output_folder):
+    def download_file_from_ftp_by_name(self, accession, file_name, output_folder, protocol='ftp'):
         """
         Download files from ftp url
         :param accession: PRIDE accession
-        :param file_name: file name to download
+        :param file_name: file name, or list of file names, to download
         :param output_folder: folder to download the files
+        :param protocol: transfer protocol, ftp or https
         """
 
-        if not (os.path.isdir(output_folder)):
-            os.mkdir(output_folder)
-        response = self.get_file_from_api(accession, file_name)
-        self.download_files_from_ftp(response, output_folder)
+        os.makedirs(output_folder, exist_ok=True)
+        response = self.get_files_from_api_bulk(accession, self._as_name_list(file_name))
+        self._download(response, output_folder, protocol)
 
     def copy_file_from_dir_by_name(self, accession, file_name, input_folder):
+        """
+        Copy files by name from the given directory if they are in the PRIDE FTP folder
+        :param accession: PRIDE accession
+        :param file_name: file name, or list of file names, to copy
+        :param input_folder: file path of the given directory
+        """
         path_fragment = self.get_submitted_file_path_prefix(accession)
         complete_source_dir = input_folder + "/" + path_fragment + "/submitted/"
 
         if not (os.path.isdir(complete_source_dir)):
             logging.exception("Folder does not exists! " + complete_source_dir)
 
-        file_list_from_dir = self.get_files_from_dir(complete_source_dir, file_name)
-        response_body = self.get_file_from_api(accession, file_name)
+        file_names = self._as_name_list(file_name)
+        file_list_from_dir = set()
+        for name in file_names:
+            file_list_from_dir |= self.get_files_from_dir(complete_source_dir, name)
+        response_body = self.get_files_from_api_bulk(accession, file_names)
 
         self.copy_from_dir(complete_source_dir, file_list_from_dir, response_body)
 
+    @staticmethod
+    def _as_name_list(file_name):
+        """
+        Accept either a single file name or a list of file names
+        :param file_name: file name or list of file names
+        :return: list of file names
+        """
+        if isinstance(file_name, str):
+            return [file_name]
+        return list(file_name)
+
+    def get_files_from_api_bulk(self, accession, file_names, page_size=1000):
+        """
+        Fetches several files of a project from API with a single query instead of one call per file
+        :param accession: PRIDE accession
+        :param file_names: list of file names
+        :param page_size: Number of results to fetch in a page
+        :return: files in json format, in the same order as file_names
+        :raises FileNotFoundError: if any of the files is not found in the project
+        """
+        if len(file_names) == 1:
+            return self.get_file_from_api(accession, file_names[0])
+
+        # RSQL quoted values escape backslashes and double quotes with a backslash
+        quoted_names = ",".join('"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+                                for name in file_names)
+        query_filter = "projectAccessions=in=(" + accession + "),fileName=in=(" + quoted_names + ")"
+
+        try:
+            files_by_name = {file['fileName']: file
+                             for file in self.iter_files(query_filter, page_size, "ASC", "fileName")}
+        except requests.HTTPError as http_error:
+            if self._is_not_found(http_error):
+                raise FileNotFoundError(", ".join(file_names) + " not found in " + accession) from http_error
+            raise
+
+        missing_names = [name for name in file_names if name not in files_by_name]
+        if missing_names:
+            raise FileNotFoundError(", ".join(missing_names) + " not found in " + accession)
+        return [files_by_name[name] for name in file_names]
+
     def get_file_from_api(self, accession, file_name):
         """
         Fetches file from API
         :param accession: PRIDE accession
         :param file_name: file name
         :return: file in json format
+        :raises FileNotFoundError: if the file is not found in the project
         """
-        request_url = self.api_base_url + "files/byProject?accession=" + accession + ",fileName==" + file_name
-        headers = {"Accept": "application/JSON"}
+        request_url = self._build_url("files/byProject", {"accession": accession + ",fileName==" + file_name})
         try:
-            response = Util.get_api_call(request_url, headers)
-            return response.json()
-        except Exception as e:
-            raise Exception("File not found" + str(e))
+            response = Util.get_api_call(request_url)
+        except requests.HTTPError as http_error:
+            if self._is_not_found(http_error):
+                raise FileNotFoundError(file_name + " not found in " + accession) from http_error
+            raise
+
+        files = _parse_json(response)
+        if not files:
+            raise FileNotFoundError(file_name + " not found in " + accession)
+        return files
 
     @staticmethod
-    def copy_from_dir(complete_source_dir, file_list_from_dir, file_list_json):
+    def _is_not_found(http_error):
         """
-        Copy files from nfs directory
+        Tell whether a PRIDE API error means that the requested resource does not exist
+        :param http_error: requests HTTPError
+        :return: True for 404 responses
+        """
+        return http_error.response is not None and http_error.response.status_code == 404
+
+    @staticmethod
+    def copy_from_dir(complete_source_dir, file_list_from_dir, file_list_json, max_workers=8, link_if_possible=True):
+        """
+        Copy files from nfs directory. Files are copied in parallel, one file per worker thread.
         :param complete_source_dir: nfs directory
         :param file_list_from_dir: files to copy
         :param file_list_json: file list from api
+        :param max_workers: number of files to copy concurrently
+        :param link_if_possible: hard link the files instead of copying them when source and destination
+                                 are in the same file system
         :return:
         """
+        file_set_from_dir = set(file_list_from_dir)
+        copy_list = []
         for file in file_list_json:
-            ftp_filepath = file['publicFileLocations'][0]['value']
+            ftp_filepath = Files._pick_location(file)
             file_name_from_ftp = ftp_filepath.rsplit('/', 1)[1]
-            if file_name_from_ftp in file_list_from_dir:
+            if file_name_from_ftp in file_set_from_dir:
                 source_file = complete_source_dir + file_name_from_ftp
                 destination_file = file['accession'] + "-" + file_name_from_ftp
-                shutil.copy2(source_file, destination_file)
+                copy_list.append((source_file, destination_file))
             else:
                 logging.error(file_name_from_ftp + " not found in " + complete_source_dir)
+
+        Files._run_in_parallel(lambda copy: Files._copy_file(*copy, link_if_possible), copy_list,
+                               lambda copy: copy[1], max_workers)
+
+    @staticmethod
+    def _copy_file(source_file, destination_file, link_if_possible=True):
+        """
+        Copy a single file, hard linking it when possible so that no data is copied
+        :param source_file: source file path
+        :param destination_file: destination file path
+        :param link_if_possible: try to hard link the file before copying it
+        """
+        if os.path.exists(destination_file) and os.path.samefile(source_file, destination_file):
+            # linked by a previous run, copying a file onto itself would fail
+            logging.debug(destination_file + " is already linked to " + source_file)
+            return
+        if link_if_possible:
+            try:
+                os.link(source_file, destination_file)
+                return
+            except OSError as link_error:
+                # eg: EXDEV when source and destination are in different file systems
+                logging.debug("Could not link " + source_file + ", copying it: " + str(link_error))
+        shutil.copy2(source_file, destination_file)
@@ -25,7 +25,9 @@ def main():
               help='If enabled, files will be downloaded from FTP, otherwise copy from file system')
 @click.option('-i', '--input_folder', required=False, help='Input folder to copy the raw files')
 @click.option('-o', '--output_folder', required=True, help='output folder to download or copy raw files')
-def download_all_raw_files(accession, ftp_download_enabled, input_folder, output_folder):
+@click.option('-p', '--protocol', type=click.Choice(['ftp', 'https']), default='ftp',
+              help='Protocol used to download the files')
+def download_all_raw_files(accession, ftp_download_enabled, input_folder, output_folder, protocol):
     """
     This script download raw files from FTP or copy from the file system
     """
@@ -36,7 +38,7 @@ def download_all_raw_files(accession, ftp_download_enabled, input_folder, output
 
     if ftp_download_enabled:
         logging.info("Data will be download from ftp")
-        raw_files.download_raw_files_from_ftp(accession, output_folder)
+        raw_files.download_raw_files_from_ftp(accession, output_folder, protocol)
     else:
         logging.info("Data will be copied from file system " + output_folder)
         raw_files.copy_raw_files_from_dir(accession, input_folder)
@@ -46,10 +48,13 @@ def download_all_raw_files(accession, ftp_download_enabled, input_folder, output
 @click.option('-a', '--accession', required=True, help='PRIDE project accession')
 @click.option('-ftp', '--ftp_download_enabled', type=bool, default='True',
               help='If enabled, files will be downloaded from FTP, otherwise copy from file system')
-@click.option('-f', '--file_name', required=True, help='fileName to be downloaded')
+@click.option('-f', '--file_name', required=True, multiple=True,
+              help='fileName to be downloaded, repeat the option to download several files')
 @click.option('-i', '--input_folder', required=False, help='Input folder to copy the files')
 @click.option('-o', '--output_folder', required=True, help='output folder to download or copy files')
-def download_files_by_name(accession, file_name, ftp_download_enabled, input_folder, output_folder):
+@click.option('-p', '--protocol', type=click.Choice(['ftp', 'https']), default='ftp',
+              help='Protocol used to download the files')
+def download_files_by_name(accession, file_name, ftp_download_enabled, input_folder, output_folder, protocol):
     """
     This script download files from FTP or copy from the file system
     """
@@ -60,7 +65,7 @@ def download_files_by_name(accession, file_name, ftp_download_enabled, input_fol
 
     if ftp_download_enabled:
         logging.info("Data will be download from ftp")
-        raw_files.download_file_from_ftp_by_name(accession, file_name, output_folder)
+        raw_files.download_file_from_ftp_by_name(accession, file_name, output_folder, protocol)
     else:
         logging.info("Data will be copied from file system " + output_folder)
         raw_files.copy_file_from_dir_by_name(accession, file_name, input_folder)
@@ -24,6 +24,9 @@ setup(
         'setuptools',
         'plotly'
     ],
+    extras_require={
+        'fast': ['orjson']
+    },
     entry_points='''
         [console_scripts]
         pridepy=pridepy:main
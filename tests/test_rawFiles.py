@@ -1,6 +1,25 @@
-from unittest import TestCase
+import errno
+import hashlib
+import json
+import os
+import tempfile
+from unittest import TestCase, mock
 
-from files.files import Files
+import requests
+
+from files.files import Files, _save_json_file
+
+
+class FakeResponse:
+    """
+    Minimal stand-in for a PRIDE API response
+    """
+
+    def __init__(self, body):
+        self.content = json.dumps(body).encode()
+
+    def json(self):
+        return json.loads(self.content)
 
 
 class TestRawFiles(TestCase):
@@ -18,6 +37,56 @@ class TestRawFiles(TestCase):
         result = raw.get_all_raw_file_list("PXD008644")
         assert len(result) == 2
 
+    def test_get_all_raw_file_list_from_disk_cache(self):
+        """
+        A test method to check that a fresh cached raw file list is used instead of calling the API
+        """
+        cached_list = [{"accession": "PXF01", "fileName": "a.raw"}]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with open(os.path.join(cache_dir, "PXD000000.json"), "w") as cache_file:
+                json.dump(cached_list, cache_file)
+
+            raw = Files(cache_ttl=3600)
+            raw.cache_dir = cache_dir
+            assert raw.get_all_raw_file_list("PXD000000") == cached_list
+
+    def test_get_all_raw_file_list_refreshes_expired_disk_cache(self):
+        """
+        A test method to check that an expired cached raw file list is fetched again from the API
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            raw = Files(cache_ttl=60)
+            raw.cache_dir = cache_dir
+            with mock.patch("files.files.Util.get_api_call",
+                            side_effect=[FakeResponse([{"fileName": "a.raw"}]),
+                                         FakeResponse([{"fileName": "b.raw"}])]) as api_call:
+                assert raw.get_all_raw_file_list("PXD000001") == [{"fileName": "a.raw"}]
+
+                expired = os.path.getmtime(os.path.join(cache_dir, "PXD000001.json")) - 120
+                os.utime(os.path.join(cache_dir, "PXD000001.json"), (expired, expired))
+                assert raw.get_all_raw_file_list("PXD000001") == [{"fileName": "b.raw"}]
+            assert api_call.call_count == 2
+
+    def test_get_all_raw_file_list_returns_a_copy(self):
+        """
+        A test method to check that changing a returned raw file list does not change the cached one
+        """
+        raw_file_list = [{"fileName": "a.raw"}, {"fileName": "b.raw"}]
+        with mock.patch("files.files.Util.get_api_call", return_value=FakeResponse(raw_file_list)):
+            Files().get_all_raw_file_list("PXD000002").pop()
+            assert Files().get_all_raw_file_list("PXD000002") == raw_file_list
+
+    def test_save_json_file_removes_temporary_file_on_error(self):
+        """
+        A test method to check that a failed cache write does not leave temporary files behind
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with mock.patch("files.files.os.replace", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    _save_json_file(os.path.join(cache_dir, "PXD000000.json"), [{"fileName": "a.raw"}])
+
+            assert os.listdir(cache_dir) == []
+
     def test_get_raw_file_path_prefix(self):
         """
         At pride repository, public data is disseminated according to a proper structure.
@@ -28,3 +97,228 @@ class TestRawFiles(TestCase):
         """
         raw = Files()
         assert raw.get_submitted_file_path_prefix("PXD008644") == "2018/10/PXD008644"
+
+    def test_get_files_from_dir(self):
+        """
+        A test method to check that only the files matching the pattern are picked from a directory
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ["a.raw", "b.raw", "c.mzML"]:
+                open(os.path.join(tmp_dir, name), "w").close()
+
+            result = Files.get_files_from_dir(tmp_dir + "/", "*.raw")
+            assert result == {"a.raw", "b.raw"}
+
+            assert Files.get_files_from_dir(os.path.join(tmp_dir, "missing") + "/", "*.raw") == set()
+            assert Files.get_files_from_dir(os.path.join(tmp_dir, "a.raw") + "/", "*.raw") == set()
+
+    def test_copy_from_dir(self):
+        """
+        A test method to check that files found in the directory are copied with the PRIDE file accession as prefix
+        """
+        file_list_json = [
+            {"accession": "PXF01", "publicFileLocations": [
+                {"name": "Aspera Protocol", "value": "prd_ascp@fasp.ebi.ac.uk:pride/data/archive/2018/10/PXD0/a.raw"},
+                {"name": "FTP Protocol", "value": "ftp://ftp.pride.ebi.ac.uk/pride/data/archive/2018/10/PXD0/a.raw"}]},
+            {"accession": "PXF02", "publicFileLocations": [
+                {"name": "FTP Protocol", "value": "ftp://ftp.pride.ebi.ac.uk/pride/data/archive/2018/10/PXD0/b.raw"}]}
+        ]
+        with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as output_dir:
+            with open(os.path.join(source_dir, "a.raw"), "w") as raw_file:
+                raw_file.write("raw content")
+
+            current_dir = os.getcwd()
+            os.chdir(output_dir)
+            try:
+                Files.copy_from_dir(source_dir + "/", {"a.raw"}, file_list_json)
+                # copying again into the same folder must not fail on the files linked by the first run
+                Files.copy_from_dir(source_dir + "/", {"a.raw"}, file_list_json)
+            finally:
+                os.chdir(current_dir)
+
+            assert os.listdir(output_dir) == ["PXF01-a.raw"]
+            with open(os.path.join(output_dir, "PXF01-a.raw")) as copied_file:
+                assert copied_file.read() == "raw content"
+
+    def test_fetch_one_resumes_partial_download(self):
+        """
+        A test method to check that a partially downloaded file is resumed from its current size
+        """
+        content = b"0123456789" * 3
+
+        class PartialFTP:
+            def retrbinary(self, cmd, callback, blocksize=8192, rest=None):
+                self.rest = rest
+                callback(content[rest or 0:])
+
+        ftp = PartialFTP()
+        with tempfile.TemporaryDirectory() as output_dir:
+            file_path = os.path.join(output_dir, "a.raw")
+            with open(file_path, "wb") as partial_file:
+                partial_file.write(content[:12])
+
+            checksum = Files._fetch_one(ftp, "/pride/a.raw", file_path, len(content))
+
+            assert ftp.rest == 12
+            with open(file_path, "rb") as downloaded_file:
+                assert downloaded_file.read() == content
+            assert checksum == hashlib.sha1(content).hexdigest()
+
+    def test_get_files_from_api_bulk(self):
+        """
+        A test method to check that several files are fetched with a single RSQL query and returned in the
+        requested order
+        """
+        body = {"_embedded": {"files": [{"accession": "PXF01", "fileName": "a.raw"},
+                                         {"accession": "PXF02", "fileName": "b.raw"}]},
+                "page": {"totalPages": 1}}
+        with mock.patch("files.files.Util.get_api_call", return_value=FakeResponse(body)) as api_call:
+            result = Files().get_files_from_api_bulk("PXD000000", ["b.raw", "a.raw"])
+
+        api_call.assert_called_once()
+        assert "filter=projectAccessions=in=(PXD000000),fileName=in=(%22b.raw%22,%22a.raw%22)" \
+               in api_call.call_args[0][0]
+        assert [file["accession"] for file in result] == ["PXF02", "PXF01"]
+
+    def test_get_files_from_api_bulk_missing_files(self):
+        """
+        A test method to check that files missing from the project are reported as FileNotFoundError
+        """
+        body = {"_embedded": {"files": [{"accession": "PXF01", "fileName": "a.raw"}]},
+                "page": {"totalPages": 1}}
+        with mock.patch("files.files.Util.get_api_call", return_value=FakeResponse(body)):
+            with self.assertRaises(FileNotFoundError) as not_found:
+                Files().get_files_from_api_bulk("PXD000000", ["c.raw", "a.raw", "d.raw"])
+
+        assert str(not_found.exception) == "c.raw, d.raw not found in PXD000000"
+
+    def test_get_files_from_api_bulk_single_file(self):
+        """
+        A test method to check that a single file is fetched with the byProject endpoint
+        """
+        file = {"accession": "PXF01", "fileName": "a.raw"}
+        with mock.patch("files.files.Util.get_api_call", return_value=FakeResponse([file])) as api_call:
+            assert Files().get_files_from_api_bulk("PXD000000", ["a.raw"]) == [file]
+
+        assert "files/byProject?accession=PXD000000,fileName==a.raw" in api_call.call_args[0][0]
+
+    def test_get_files_from_api_bulk_escapes_quotes(self):
+        """
+        A test method to check that double quotes in file names are escaped in the RSQL query
+        """
+        body = {"page": {"totalPages": 0}}
+        with mock.patch("files.files.Util.get_api_call", return_value=FakeResponse(body)) as api_call:
+            with self.assertRaises(FileNotFoundError):
+                Files().get_files_from_api_bulk("PXD000000", ['a"b.raw', "c.raw"])
+
+        assert "fileName=in=(%22a%5C%22b.raw%22,%22c.raw%22)" in api_call.call_args[0][0]
+
+    def test_verify_checksum_removes_corrupt_file(self):
+        """
+        A test method to check that a downloaded file not matching the PRIDE checksum is removed
+        """
+        content = b"raw content"
+        with tempfile.TemporaryDirectory() as output_dir:
+            file_path = os.path.join(output_dir, "a.raw")
+            with open(file_path, "wb") as downloaded_file:
+                downloaded_file.write(content)
+
+            Files._verify_checksum(file_path, hashlib.sha1(content).hexdigest().upper(),
+                                   hashlib.sha1(content).hexdigest())
+            assert os.path.exists(file_path)
+
+            with self.assertRaises(ValueError):
+                Files._verify_checksum(file_path, hashlib.sha1(b"other content").hexdigest(),
+                                       hashlib.sha1(content).hexdigest())
+            assert not os.path.exists(file_path)
+
+    def test_retry_only_transient_errors(self):
+        """
+        A test method to check that downloads are retried on network and server errors only
+        """
+        def http_error(status_code):
+            response = requests.Response()
+            response.status_code = status_code
+            return requests.HTTPError(response=response)
+
+        with mock.patch.object(Files, "retry_backoff", 0):
+            fetch = mock.Mock(side_effect=[http_error(503), requests.ConnectionError(), "checksum"])
+            assert Files._retry(fetch, "a.raw", Files._is_transient_https_error) == "checksum"
+            assert fetch.call_count == 3
+
+            fetch = mock.Mock(side_effect=http_error(404))
+            with self.assertRaises(requests.HTTPError):
+                Files._retry(fetch, "a.raw", Files._is_transient_https_error)
+            assert fetch.call_count == 1
+
+            def is_transient_ftp_error(error):
+                return isinstance(error, Files._ftp_retry_errors)
+
+            fetch = mock.Mock(side_effect=[ConnectionResetError(), "checksum"])
+            assert Files._retry(fetch, "a.raw", is_transient_ftp_error) == "checksum"
+
+            fetch = mock.Mock(side_effect=OSError(errno.ENOSPC, "No space left on device"))
+            with self.assertRaises(OSError):
+                Files._retry(fetch, "a.raw", is_transient_ftp_error)
+            assert fetch.call_count == 1
+
+    def test_get_file_from_api_not_found(self):
+        """
+        A test method to check that a file missing from a project is reported as FileNotFoundError
+        """
+        response = requests.Response()
+        response.status_code = 404
+        not_found = requests.HTTPError(response=response)
+        with mock.patch("files.files.Util.get_api_call", side_effect=not_found):
+            with self.assertRaises(FileNotFoundError):
+                Files().get_file_from_api("PXD000000", "a.raw")
+
+        with mock.patch("files.files.Util.get_api_call", return_value=FakeResponse([])):
+            with self.assertRaises(FileNotFoundError):
+                Files().get_file_from_api("PXD000000", "a.raw")
+
+        file = {"accession": "PXF01", "fileName": "a.raw"}
+        with mock.patch("files.files.Util.get_api_call", return_value=FakeResponse([file])):
+            assert Files().get_file_from_api("PXD000000", "a.raw") == [file]
+
+    def test_run_in_parallel_reports_all_failures(self):
+        """
+        A test method to check that every failed file is reported, not only the first one
+        """
+        def action(name):
+            if name != "b.raw":
+                raise OSError("cannot copy " + name)
+
+        with self.assertLogs(level="ERROR") as logs:
+            with self.assertRaises(Exception) as summary:
+                Files._run_in_parallel(action, ["a.raw", "b.raw", "c.raw"], lambda name: name, 2)
+
+        assert str(summary.exception) == "2 of 3 files failed: a.raw, c.raw"
+        assert sorted(logs.output) == ["ERROR:root:a.raw failed: cannot copy a.raw",
+                                       "ERROR:root:c.raw failed: cannot copy c.raw"]
+
+    def test_iter_files_with_clamped_page_size(self):
+        """
+        A test method to check that all pages are read when the server returns smaller pages than requested
+        """
+        pages = [{"_embedded": {"files": [{"fileName": "a.raw"}, {"fileName": "b.raw"}]},
+                  "page": {"size": 2, "totalPages": 2}},
+                 {"_embedded": {"files": [{"fileName": "c.raw"}]},
+                  "page": {"size": 2, "totalPages": 2}}]
+        with mock.patch.object(Files, "get_all_paged_files", side_effect=pages) as paged_files:
+            result = list(Files().iter_files("projectAccessions==PXD000000", 1000))
+
+        assert [file["fileName"] for file in result] == ["a.raw", "b.raw", "c.raw"]
+        assert paged_files.call_count == 2
+
+    def test_get_files_from_api_bulk_not_found(self):
+        """
+        A test method to check that a 404 from the files search is reported as FileNotFoundError
+        """
+        response = requests.Response()
+        response.status_code = 404
+        with mock.patch("files.files.Util.get_api_call", side_effect=requests.HTTPError(response=response)):
+            with self.assertRaises(FileNotFoundError) as not_found:
+                Files().get_files_from_api_bulk("PXD000000", ["a.raw", "b.raw"])
+
+        assert str(not_found.exception) == "a.raw, b.raw not found in PXD000000"
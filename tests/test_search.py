@@ -96,3 +96,20 @@ class TestSearch(TestCase):
 
         result = files.get_all_paged_files("projectAccessions==PXD022105", "100", 0, "ASC", "submissionDate")
         assert result['page']['totalElements'] == 11
+
+        result = list(files.iter_files("projectAccessions==PXD022105", 5))
+        assert len(result) == 11
+
+    def test_get_files_by_name(self):
+        """
+        A test method to fetch files of a project by name
+        """
+        files = Files()
+
+        result = files.get_files_from_api_bulk("PXD022105", ["checksum.txt"])
+        assert result[0]['fileName'] == "checksum.txt"
+
+        # the single RSQL query must find the existing file and report only the missing one
+        with self.assertRaises(FileNotFoundError) as not_found:
+            files.get_files_from_api_bulk("PXD022105", ["checksum.txt", "missing_file.raw"])
+        assert str(not_found.exception) == "missing_file.raw not found in PXD022105"
@@ -3,6 +3,22 @@
 import requests
 import logging
 from ratelimit import limits, sleep_and_retry
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+
+def _create_session():
+    """
+    Create the HTTP session shared by all the API calls, so that connections to PRIDE API are kept alive
+    and reused instead of doing a new TLS handshake on every call. Connection errors and transient
+    gateway errors are retried with exponential backoff.
+    :return: requests Session
+    """
+    retry = Retry(total=5, backoff_factor=0.5, status_forcelist=[502, 503, 504], raise_on_status=False)
+    session = requests.Session()
+    session.headers.update({"Accept": "application/JSON"})
+    session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry))
+    return session
 
 
 class Util:
@@ -10,19 +26,25 @@ class Util:
     This class contains all the utility methods
     """
 
+    _session = _create_session()
+    # seconds to wait for PRIDE API to connect or send data, so that timeouts can be retried instead of hanging
+    api_timeout = 60
+
     @staticmethod
     @sleep_and_retry
     @limits(calls=1000, period=50)
-    def get_api_call(url, headers):
+    def get_api_call(url, headers=None):
         """
         Given a url, this method will do a HTTP request and get the response
         :param url:PRIDE API URL
-        :param headers: HTTP headers
+        :param headers: HTTP headers, added to the session default Accept: application/JSON header
         :return: Response
         """
-        response = requests.get(url, headers)
+        response = Util._session.get(url, headers=headers, timeout=Util.api_timeout)
 
-        if (not response.ok) or response.status_code != 200:
+        # HTTP errors are raised as requests.HTTPError, which keeps the response and its status code
+        response.raise_for_status()
+        if response.status_code != 200:
             raise Exception('PRIDE API response: {}'.format(response.status_code))
         return response
 
@@ -36,7 +58,7 @@ class Util:
         :return: Response
         """
 
-        response = requests.put(url, data=data, headers=headers)
+        response = Util._session.put(url, data=data, headers=headers, timeout=Util.api_timeout)
 
         if (not response.ok) or response.status_code != 200:
             raise Exception('PRIDE API response: {}'.format(response.status_code))